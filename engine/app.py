@@ -505,8 +505,9 @@ elif scenario == "🕸️ Demo Grafo":
         st.subheader("🔧 Detalles de Nodos")
         
         node_data = []
+        degrees = dict(G.degree())
         for n in nodes.values():
-            degree = G.degree(n.name)
+            degree = degrees[n.name]
             utilization = (n.load / n.capacity * 100) if n.capacity > 0 else 0
             
             # Emoji según utilización
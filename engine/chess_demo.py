@@ -4,6 +4,7 @@
 # NOTA: Este es un DEMO EXPERIMENTAL para observar métricas estructurales en ajedrez.
 
 from typing import List, Tuple, Optional
+import functools
 import streamlit as st
 import streamlit.components.v1 as components
 import pandas as pd
@@ -17,7 +18,8 @@ from mcl_chess import (
     compute_holistic_metrics
 )
 from rate_limiter import (
-    timeout,
+    soft_timeout,
+    check_deadline,
     TimeoutError,
     validate_computational_cost
 )
@@ -61,6 +63,27 @@ def validate_max_moves(max_moves: int) -> int:
 # -----------------------------
 # Funciones auxiliares
 # -----------------------------
+@functools.lru_cache(maxsize=512)
+def _render_board_svg_cached(board_fen: str, size: int) -> str:
+    """
+    Renderiza el SVG de una posición identificada por su board_fen.
+    
+    chess.svg.board solo lee la colocación de piezas, así que la posición
+    (board_fen) y el tamaño determinan completamente el resultado.
+    """
+    return chess.svg.board(
+        board=chess.BaseBoard(board_fen),
+        size=size,
+        coordinates=True,
+        colors={
+            "square light": "#f0d9b5",
+            "square dark": "#b58863",
+            "square light lastmove": "#cdd26a",
+            "square dark lastmove": "#aaa23a"
+        }
+    )
+
+
 def render_board_svg(board: chess.Board, size: int = 400) -> str:
     """
     Renderiza el tablero en formato SVG gráfico usando python-chess.
@@ -82,24 +105,49 @@ def render_board_svg(board: chess.Board, size: int = 400) -> str:
         if not isinstance(size, int) or size < 100 or size > 1000:
             raise ValueError(f"size debe estar entre 100-1000: {size}")
         
-        svg = chess.svg.board(
-            board=board,
-            size=size,
-            coordinates=True,
-            colors={
-                "square light": "#f0d9b5",
-                "square dark": "#b58863",
-                "square light lastmove": "#cdd26a",
-                "square dark lastmove": "#aaa23a"
-            }
-        )
+        # Cacheado por (posición, tamaño): re-renderizar el mismo estado del
+        # historial (reruns de Streamlit, navegación por turnos) es O(1)
+        svg = _render_board_svg_cached(board.board_fen(), size)
         return svg
     except Exception as e:
         logger.error(f"Error renderizando tablero: {e}")
         raise RuntimeError(f"Fallo al renderizar tablero: {e}") from e
 
 
-@timeout(seconds=60)
+def render_history_svg(
+    history: List[Tuple[int, float, float, chess.Board, str]],
+    size: int = 300
+) -> List[str]:
+    """
+    Renderiza en SVG todos los tableros de un historial de run_game_stepwise.
+
+    Args:
+        history: Lista de tuplas (move_count, H, H_eff, board, move_san)
+        size: Tamaño de cada tablero en pixels
+
+    Returns:
+        Lista de strings SVG, uno por registro del historial
+
+    Raises:
+        RuntimeError: Si algún tablero o el tamaño son inválidos
+    """
+    try:
+        if not isinstance(size, int) or size < 100 or size > 1000:
+            raise ValueError(f"size debe estar entre 100-1000: {size}")
+
+        # size se valida una sola vez; las posiciones repetidas salen del caché
+        svgs = []
+        for _, _, _, board, _ in history:
+            if not isinstance(board, chess.Board):
+                raise TypeError(f"board debe ser chess.Board, recibido {type(board).__name__}")
+            svgs.append(_render_board_svg_cached(board.board_fen(), size))
+        return svgs
+    except Exception as e:
+        logger.error(f"Error renderizando historial: {e}")
+        raise RuntimeError(f"Fallo al renderizar tablero: {e}") from e
+
+
+@soft_timeout(seconds=60)
 def run_game_stepwise(max_moves: int = 50, rng: Optional[random.Random] = None) -> List[Tuple[int, float, float, chess.Board, str]]:
     """
     Ejecuta una partida paso a paso, guardando estado del tablero y movimientos.
@@ -129,23 +177,28 @@ def run_game_stepwise(max_moves: int = 50, rng: Optional[random.Random] = None)
         
         # Estado inicial (sin movimiento)
         H, H_eff = compute_holistic_metrics(board)
-        history.append((0, H, H_eff, board.copy(), "Posición inicial"))
+        # Snapshots sin move_stack (~10x más baratos que board.copy()): los
+        # estados intermedios solo se usan para mostrar la posición
+        history.append((0, H, H_eff, board.copy(stack=False), "Posición inicial"))
         
         for move_count in range(max_moves):
+            check_deadline()
+            
             if board.is_game_over():
                 logger.info(f"Juego terminado en turno {move_count}")
                 break
             
             # Movimiento aleatorio
-            legal_moves = list(board.legal_moves)
+            legal_moves = list(board.generate_legal_moves())
             if not legal_moves:
                 logger.warning(f"Sin movimientos legales en turno {move_count}")
                 break
             
             try:
                 move = rng.choice(legal_moves)
-                move_san = board.san(move)  # Notación algebraica estándar (e.g., "Nf3", "e4")
-                board.push(move)
+                # Notación algebraica estándar (e.g., "Nf3", "e4") calculada al aplicar
+                # el movimiento: evita el push/pop extra que hace board.san()
+                move_san = board.san_and_push(move)
             except Exception as e:
                 logger.error(f"Error aplicando movimiento en turno {move_count}: {e}")
                 break
@@ -158,16 +211,26 @@ def run_game_stepwise(max_moves: int = 50, rng: Optional[random.Random] = None)
                 break
             
             # Guardar estado
-            history.append((move_count + 1, H, H_eff, board.copy(), move_san))
+            history.append((move_count + 1, H, H_eff, board.copy(stack=False), move_san))
             
             # Detección de colapso estructural
             if H_eff <= 0.1:
                 logger.warning(f"Colapso estructural en turno {move_count + 1}")
                 break
         
+        # El estado final conserva el historial completo para que
+        # is_game_over() detecte también repeticiones (si el loop cortó tras
+        # un error, el tablero puede ir por delante del último estado guardado)
+        final_turn, final_H, final_H_eff, _, final_san = history[-1]
+        if len(board.move_stack) == final_turn:
+            history[-1] = (final_turn, final_H, final_H_eff, board.copy(), final_san)
+        
         logger.info(f"Partida completa: {len(history)} estados")
         return history
         
+    except TimeoutError:
+        logger.error(f"Timeout en partida (max_moves={max_moves})")
+        raise
     except (TypeError, ValueError) as e:
         logger.error(f"Error validando parámetros: {e}")
         raise
@@ -209,7 +209,8 @@ def compare(
                 raise TypeError(f"Elemento debe ser Scenario, recibido {type(s).__name__}")
             
             try:
-                series = s.simulate()
+                # El ranking solo usa H_eff inicial y el primer paso de degradación
+                series = s.simulate(steps=2)
                 dH = abs(series[1] - series[0]) if len(series) > 1 else 0
                 cls = classify(series[0], dH, alpha_h_min, alpha_decay_max, beta_h_min)
 
@@ -0,0 +1,17 @@
+# conftest.py
+# Fixtures compartidas por los tests de engine/
+
+import pytest
+import chess
+
+
+@pytest.fixture(scope="session")
+def initial_board():
+    """Tablero en posición inicial compartido por la sesión (solo lectura)."""
+    return chess.Board()
+
+
+@pytest.fixture
+def fresh_board(initial_board):
+    """Copia mutable de la posición inicial (copy es más barato que Board())."""
+    return initial_board.copy(stack=False)
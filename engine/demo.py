@@ -6,6 +6,7 @@
 from typing import Dict, Tuple, Optional
 import streamlit as st
 import networkx as nx
+import numpy as np
 import random
 import logging
 from rate_limiter import (
@@ -88,26 +89,30 @@ def build_graph(n: int = 6, rng: Optional[random.Random] = None) -> Tuple[nx.Gra
         if rng is None:
             rng = _demo_rng
         
-        logger.info(f"Construyendo grafo con {n} nodos")
+        # Formato %-style: logging solo formatea si el nivel está habilitado
+        logger.info("Construyendo grafo con %d nodos", n)
         G = nx.Graph()
         nodes = {}
 
+        randint = rng.randint
         for i in range(n):
-            cap = rng.randint(80, 120)
-            load = rng.randint(40, cap)
+            cap = randint(80, 120)
+            load = randint(40, cap)
             node = Node(f"N{i}", cap, load)
             nodes[node.name] = node
             G.add_node(node.name, slack=node.slack)
 
         # Asegurar conectividad mínima
-        for _ in range(n + 2):
-            node_list = list(nodes.keys())
-            if len(node_list) < 2:
-                break
-            a, b = rng.sample(node_list, 2)
-            G.add_edge(a, b, friction=rng.uniform(0.1, 0.5))
+        # (la lista de nodos no cambia dentro del loop: se construye una vez)
+        node_list = list(nodes.keys())
+        if len(node_list) >= 2:
+            sample = rng.sample
+            uniform = rng.uniform
+            for _ in range(n + 2):
+                a, b = sample(node_list, 2)
+                G.add_edge(a, b, friction=uniform(0.1, 0.5))
         
-        logger.info(f"Grafo construido: {G.number_of_nodes()} nodos, {G.number_of_edges()} aristas")
+        logger.info("Grafo construido: %d nodos, %d aristas", G.number_of_nodes(), G.number_of_edges())
         return G, nodes
         
     except (TypeError, ValueError) as e:
@@ -150,34 +155,38 @@ def compute_metrics(G: nx.Graph, nodes: Dict[str, Node]) -> Tuple[float, float,
             logger.warning("compute_metrics llamado con 0 nodos")
             return 0.0, 0.0, 0.0
         
-        logger.debug(f"Calculando métricas para {len(nodes)} nodos")
+        logger.debug("Calculando métricas para %d nodos", len(nodes))
         
-        H = sum(n.slack for n in nodes.values())
+        n_nodes = len(nodes)
+        capacity = np.fromiter((n.capacity for n in nodes.values()), dtype=np.float64, count=n_nodes)
+        load = np.fromiter((n.load for n in nodes.values()), dtype=np.float64, count=n_nodes)
+        
+        H = float(np.maximum(capacity - load, 0.0).sum())
         
         # H_eff: ponderar slack por accesibilidad estructural (grado del nodo)
         if G.number_of_edges() == 0:
             # Grafo sin conexiones: H_eff = 0 (ninguna holgura es accesible)
             H_eff = 0.0
         else:
-            degrees = dict(G.degree())
-            max_degree = max(degrees.values()) if degrees else 1
-            H_eff = 0.0
-            for name, node in nodes.items():
-                if node.slack > 0 and name in degrees:
-                    degree = degrees[name]
-                    accessibility = degree / max_degree  # Factor estructural observable
-                    H_eff += node.slack * accessibility
+            # Grados y holguras como arrays alineados (sin dict intermedio);
+            # nodos del grafo sin Node asociado no aportan holgura
+            names, degrees = zip(*G.degree())
+            degrees = np.asarray(degrees, dtype=np.int32)
+            slacks = np.fromiter(
+                (nodes[name].slack if name in nodes else 0.0 for name in names),
+                dtype=np.float64,
+                count=len(names),
+            )
+            max_degree = int(degrees.max())
+            # Accesibilidad = grado / grado máximo (factor estructural observable);
+            # la normalización se aplica una vez sobre el producto escalar
+            H_eff = float(np.dot(slacks, degrees.astype(np.float64))) / max_degree
         
         # Entropía S: desviación estándar de la utilización normalizada
-        utilizations = [n.load / n.capacity if n.capacity > 0 else 0 for n in nodes.values()]
-        if not utilizations:
-            S = 0.0
-        else:
-            mean_util = sum(utilizations) / len(utilizations)
-            variance = sum((u - mean_util) ** 2 for u in utilizations) / len(utilizations)
-            S = variance ** 0.5
+        utilizations = np.divide(load, capacity, out=np.zeros(n_nodes), where=capacity > 0)
+        S = float(utilizations.std())
         
-        logger.debug(f"Métricas calculadas: H={H:.2f}, H_eff={H_eff:.2f}, S={S:.3f}")
+        logger.debug("Métricas calculadas: H=%.2f, H_eff=%.2f, S=%.3f", H, H_eff, S)
         return H, H_eff, S
         
     except (TypeError, ValueError) as e:
@@ -20,6 +20,51 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+# -----------------------------
+# Caché por grafo (Streamlit re-ejecuta el script en cada interacción)
+# -----------------------------
+def _graph_cache_key(G: nx.Graph) -> tuple:
+    """Clave de caché: identidad del grafo más su tamaño."""
+    return (id(G), G.number_of_nodes(), G.number_of_edges())
+
+
+def get_cached_graph_metrics(G: nx.Graph, nodes: dict) -> tuple:
+    """
+    Devuelve (H, H_eff, S) reutilizando el cálculo mientras el grafo no cambie.
+    
+    Streamlit re-ejecuta el script completo en cada interacción; sin caché
+    cada rerun recalcula compute_metrics aunque el grafo sea el mismo.
+    """
+    key = _graph_cache_key(G)
+    cached = st.session_state.get("metrics_cache")
+    if cached is None or cached[0] != key:
+        cached = (key, compute_metrics(G, nodes))
+        st.session_state["metrics_cache"] = cached
+    return cached[1]
+
+
+def get_cached_topology(G: nx.Graph) -> dict:
+    """
+    Devuelve conectividad, componentes y distancia promedio del grafo.
+    
+    average_shortest_path_length es O(V·E) (un BFS por nodo): se calcula
+    una sola vez por grafo en lugar de en cada rerun.
+    """
+    key = _graph_cache_key(G)
+    cached = st.session_state.get("topology_cache")
+    if cached is None or cached[0] != key:
+        is_connected = nx.is_connected(G)
+        topology = {
+            "is_connected": is_connected,
+            "components": 1 if is_connected else nx.number_connected_components(G),
+            "avg_path": nx.average_shortest_path_length(G) if is_connected else None,
+        }
+        cached = (key, topology)
+        st.session_state["topology_cache"] = cached
+    return cached[1]
+
+
 st.set_page_config(page_title="SHE Demo - Modo Grafo", layout="wide")
 
 st.title("Structural Health Engine · Demo Grafo")
@@ -63,6 +108,7 @@ if st.sidebar.button("🎲 Generar sistema", type="primary"):
         with st.spinner(f"Generando sistema con {num_nodes} nodos..."):
             G, nodes = build_graph(num_nodes, rng=new_rng)
             st.session_state["graph"] = (G, nodes)
+            st.session_state["degrees"] = dict(G.degree())
             st.session_state["num_nodes"] = num_nodes
         st.success(f"✅ Sistema generado con {num_nodes} nodos")
     except TimeoutError:
@@ -78,6 +124,7 @@ if "graph" not in st.session_state:
         with st.spinner("Inicializando sistema..."):
             G, nodes = build_graph(num_nodes)
             st.session_state["graph"] = (G, nodes)
+            st.session_state["degrees"] = dict(G.degree())
             st.session_state["num_nodes"] = num_nodes
     except Exception as e:
         st.error(f"Error inicializando sistema: {e}")
@@ -87,6 +134,10 @@ if "graph" not in st.session_state:
 # Obtener grafo actual
 try:
     G, nodes = st.session_state["graph"]
+    # Grados calculados una sola vez por grafo (una pasada O(V+E))
+    if "degrees" not in st.session_state:
+        st.session_state["degrees"] = dict(G.degree())
+    degrees = st.session_state["degrees"]
 except Exception as e:
     st.error(f"Error recuperando grafo: {e}")
     st.stop()
@@ -97,7 +148,7 @@ except Exception as e:
 st.subheader("📊 Métricas Estructurales")
 
 try:
-    H, H_eff, S = compute_metrics(G, nodes)
+    H, H_eff, S = get_cached_graph_metrics(G, nodes)
 
     col1, col2, col3, col4 = st.columns(4)
     
@@ -154,7 +205,7 @@ try:
     # Crear tabla de datos
     node_data = []
     for n in nodes.values():
-        degree = G.degree(n.name)
+        degree = degrees[n.name]
         utilization = (n.load / n.capacity * 100) if n.capacity > 0 else 0
         
         node_data.append({
@@ -206,16 +257,18 @@ try:
     with col2:
         st.metric("Aristas", G.number_of_edges())
     
+    topology = get_cached_topology(G)
+    
     with col3:
-        is_connected = nx.is_connected(G)
+        is_connected = topology["is_connected"]
         st.metric("Conectado", "✓ Sí" if is_connected else "✗ No")
     
     with col4:
         if is_connected:
-            avg_path = nx.average_shortest_path_length(G)
+            avg_path = topology["avg_path"]
             st.metric("Distancia promedio", f"{avg_path:.2f}")
         else:
-            components = nx.number_connected_components(G)
+            components = topology["components"]
             st.metric("Componentes", components)
     
     # Información de aristas
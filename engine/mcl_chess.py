@@ -5,9 +5,11 @@
 # para explorar comportamiento estructural, no como engine de ajedrez real.
 
 from typing import Tuple, List, Optional
+from concurrent.futures import ProcessPoolExecutor
 import chess
 import random
 import logging
+from rate_limiter import check_deadline, soft_timeout, time_remaining, TimeoutError
 
 # Configurar logging
 logging.basicConfig(
@@ -24,7 +26,8 @@ _chess_rng = random.Random(42)
 # -----------------------------
 def validate_max_moves(max_moves: int) -> int:
     """Valida número máximo de movimientos."""
-    if not isinstance(max_moves, int):
+    # bool es subclase de int: rechazarlo explícitamente
+    if not isinstance(max_moves, int) or isinstance(max_moves, bool):
         raise TypeError(f"max_moves debe ser int, recibido {type(max_moves).__name__}")
     if not 1 <= max_moves <= 500:
         raise ValueError(f"max_moves fuera de rango [1, 500]: {max_moves}")
@@ -46,10 +49,90 @@ PIECE_CAPACITY = {
 # Factor de accesibilidad estructural (simplificado para demo)
 ACCESS_WEIGHT = 0.5
 
+# Capacidad indexada por piece_type (índice 0 = sin pieza) para el loop caliente
+_CAPACITY = tuple(PIECE_CAPACITY.get(piece_type, 0) for piece_type in range(chess.KING + 1))
+
+# Constantes fusionadas para H_eff: capacidad × ACCESS_WEIGHT por piece_type
+# y accesibilidad min(movilidad / 8, 1) tabulada (movilidad máxima = 27 < 64)
+_WEIGHTED_CAPACITY = tuple(capacity * ACCESS_WEIGHT for capacity in _CAPACITY)
+_ACCESSIBILITY = tuple(min(mobility / 8.0, 1.0) for mobility in range(64))
+
+# Movilidad precalculada para piezas no deslizantes: su máscara de ataque
+# no depende de la ocupación, así que basta una tabla de 64 casillas por color
+_KNIGHT_MOBILITY = bytes(chess.popcount(bb) for bb in chess.BB_KNIGHT_ATTACKS)
+_KING_MOBILITY = bytes(chess.popcount(bb) for bb in chess.BB_KING_ATTACKS)
+_STEPPER_MOBILITY = {
+    chess.PAWN: tuple(
+        bytes(chess.popcount(bb) for bb in chess.BB_PAWN_ATTACKS[color])
+        for color in (chess.BLACK, chess.WHITE)
+    ),
+    chess.KNIGHT: (_KNIGHT_MOBILITY, _KNIGHT_MOBILITY),
+    chess.KING: (_KING_MOBILITY, _KING_MOBILITY),
+}
+
 
 # -----------------------------
 # Métricas estructurales
 # -----------------------------
+def _total_capacity(board: chess.Board) -> int:
+    """Calcula H (suma de capacidades) sin validar el tablero."""
+    capacities = _CAPACITY
+    H = 0
+    
+    # Un bitboard por (tipo, color) en lugar de recorrer casilla a casilla
+    for piece_type in chess.PIECE_TYPES:
+        for color in chess.COLORS:
+            H += capacities[piece_type] * chess.popcount(board.pieces_mask(piece_type, color))
+    return H
+
+
+def _effective_slack(board: chess.Board) -> float:
+    """Calcula H_eff (slack ponderado por movilidad) sin validar el tablero."""
+    H_eff = 0.0
+    accessibilities = _ACCESSIBILITY
+    
+    for piece_type in chess.PIECE_TYPES:
+        # Slack base: capacidad no comprometida (ya ponderada por ACCESS_WEIGHT)
+        # Simplificación: asumimos que cada pieza tiene su capacidad plena
+        weighted_slack = _WEIGHTED_CAPACITY[piece_type]
+        tables = _STEPPER_MOBILITY.get(piece_type)
+        
+        for color in chess.COLORS:
+            mobility_table = tables[color] if tables else None
+            for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+                # Movilidad = casillas atacadas desde esta casilla
+                # (proxy observable de accesibilidad estructural)
+                if mobility_table:
+                    mobility = mobility_table[square]
+                else:
+                    mobility = chess.popcount(board.attacks_mask(square))
+                
+                # H_eff: ponderar por accesibilidad (movilidad)
+                # Mayor movilidad → mayor accesibilidad → mayor H_eff
+                # Si mobility == 0, accesibilidad 0: la pieza no contribuye (inaccesible)
+                H_eff += weighted_slack * accessibilities[mobility]
+    
+    return H_eff
+
+
+def _capacity_delta(board: chess.Board, move: chess.Move) -> int:
+    """
+    Variación de H que produce `move` (antes de aplicarlo).
+    
+    H solo cambia con capturas (pieza eliminada) y promociones
+    (el peón pasa a valer la capacidad de la pieza promovida).
+    """
+    delta = 0
+    if board.is_capture(move):
+        if board.is_en_passant(move):
+            delta -= _CAPACITY[chess.PAWN]
+        else:
+            delta -= _CAPACITY[board.piece_type_at(move.to_square)]
+    if move.promotion:
+        delta += _CAPACITY[move.promotion] - _CAPACITY[chess.PAWN]
+    return delta
+
+
 def compute_holistic_metrics(board: chess.Board) -> Tuple[float, float]:
     """
     Calcula métricas estructurales holísticas del tablero.
@@ -75,50 +158,23 @@ def compute_holistic_metrics(board: chess.Board) -> Tuple[float, float]:
     NOTA: Esta es una instanciación simple. El motor productivo usa
     criterios más complejos de interdependencia estructural.
     """
+    # Validación fuera del try: el bloque protegido solo envuelve el cálculo
+    if not isinstance(board, chess.Board):
+        logger.error(f"Error validando inputs: board debe ser chess.Board, recibido {type(board).__name__}")
+        raise TypeError(f"board debe ser chess.Board, recibido {type(board).__name__}")
+    
     try:
-        if not isinstance(board, chess.Board):
-            raise TypeError(f"board debe ser chess.Board, recibido {type(board).__name__}")
+        # board.fen() recorre las 64 casillas: solo construirlo si DEBUG está activo
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Calculando métricas para board: %s...", board.fen()[:20])
         
-        logger.debug(f"Calculando métricas para board: {board.fen()[:20]}...")
+        # H total: suma de todas las capacidades
+        H = float(_total_capacity(board))
+        H_eff = _effective_slack(board)
         
-        H = 0.0
-        H_eff = 0.0
-        piece_count = 0
-
-        for square, piece in board.piece_map().items():
-            if piece is None:
-                continue
-                
-            capacity = PIECE_CAPACITY.get(piece.piece_type, 0)
-            if capacity == 0:
-                logger.warning(f"Pieza desconocida: {piece.piece_type}")
-                continue
-            
-            # Movilidad = movimientos legales desde esta casilla
-            # (proxy observable de accesibilidad estructural)
-            mobility = len(list(board.attacks(square)))
-            
-            # Slack base: capacidad no comprometida
-            # Simplificación: asumimos que cada pieza tiene su capacidad plena
-            slack = capacity
-            
-            # H total: suma de todas las capacidades
-            H += slack
-            piece_count += 1
-            
-            # H_eff: ponderar por accesibilidad (movilidad)
-            # Mayor movilidad → mayor accesibilidad → mayor H_eff
-            if mobility > 0:
-                accessibility = min(mobility / 8.0, 1.0)  # Normalizar (8 = alta movilidad típica)
-                H_eff += slack * accessibility * ACCESS_WEIGHT
-            # Si mobility == 0, esta pieza no contribuye a H_eff (inaccesible)
-        
-        logger.debug(f"Métricas calculadas: H={H:.2f}, H_eff={H_eff:.2f} ({piece_count} piezas)")
+        logger.debug("Métricas calculadas: H=%.2f, H_eff=%.2f", H, H_eff)
         return H, H_eff
         
-    except (TypeError, ValueError) as e:
-        logger.error(f"Error validando inputs: {e}")
-        raise
     except Exception as e:
         logger.error(f"Error calculando métricas: {e}", exc_info=True)
         raise RuntimeError(f"Fallo al calcular métricas: {e}") from e
@@ -127,39 +183,71 @@ def compute_holistic_metrics(board: chess.Board) -> Tuple[float, float]:
 # -----------------------------
 # Simulación
 # -----------------------------
-def run_game(max_moves: int = 200, rng: Optional[random.Random] = None) -> List[Tuple[int, float, float]]:
+def run_game(
+    max_moves: int = 200,
+    rng: Optional[random.Random] = None,
+    initial_board: Optional[chess.Board] = None
+) -> List[Tuple[int, float, float]]:
     """
     Ejecuta una partida de ajedrez monitoreando métricas estructurales.
     
     Args:
         max_moves: Número máximo de movimientos (1-500)
         rng: Generador random aislado (opcional)
+        initial_board: Posición de partida (opcional, no se modifica; default
+            posición inicial estándar)
         
     Returns:
         Lista de tuplas (move_count, H, H_eff)
         
     Raises:
-        TypeError: Si max_moves no es int
+        TypeError: Si max_moves no es int o initial_board no es chess.Board
+            estándar (variantes no soportadas)
         ValueError: Si max_moves fuera de rango
+        TimeoutError: Si vence el deadline de un soft_timeout activo
     
     NOTA: Los movimientos son aleatorios simples, no hay IA.
     El propósito es observar evolución estructural, no jugar correctamente.
     """
     try:
         max_moves = validate_max_moves(max_moves)
+        if initial_board is not None:
+            if not isinstance(initial_board, chess.Board):
+                raise TypeError(f"initial_board debe ser chess.Board, recibido {type(initial_board).__name__}")
+            # Variantes (atomic, crazyhouse, ...) rompen la actualización
+            # incremental de H y el chequeo de fin de partida
+            if initial_board.uci_variant != "chess":
+                raise TypeError(f"initial_board debe ser ajedrez estándar, recibido variante {initial_board.uci_variant}")
         if rng is None:
             rng = _chess_rng
         
         logger.info(f"Iniciando simulación de partida (max_moves={max_moves})")
-        board = chess.Board()
+        board = chess.Board() if initial_board is None else initial_board.copy()
         history = []
+        choice = rng.choice
+        
+        # H solo cambia con capturas/promociones: una pasada completa y luego
+        # actualización incremental; H_eff sí depende de cada posición
+        H = float(_total_capacity(board))
 
         for move_count in range(max_moves):
-            if board.is_game_over():
+            # Corte cooperativo si el llamador usa soft_timeout (no-op si no)
+            check_deadline()
+            
+            # Equivalente a board.is_game_over() reutilizando la generación
+            # de movimientos legales para el movimiento aleatorio del turno
+            # (sin movimientos legales = mate o ahogado)
+            legal_moves = list(board.generate_legal_moves())
+            if (
+                not legal_moves
+                or board.is_insufficient_material()
+                or board.is_seventyfive_moves()
+                or board.is_fivefold_repetition()
+            ):
                 logger.info(f"Juego terminado en turno {move_count}")
                 break
 
-            H, H_eff = compute_holistic_metrics(board)
+            H_eff = _effective_slack(board)
             history.append((move_count, H, H_eff))
 
             # Detección de colapso estructural experimental
@@ -168,21 +256,21 @@ def run_game(max_moves: int = 200, rng: Optional[random.Random] = None) -> List[
                 break
 
             # Movimiento aleatorio (no determinista, no IA)
-            legal_moves = list(board.legal_moves)
-            if not legal_moves:
-                logger.info(f"Sin movimientos legales en turno {move_count}")
-                break
-            
+            move = choice(legal_moves)
+            delta = _capacity_delta(board, move)
             try:
-                move = rng.choice(legal_moves)
                 board.push(move)
             except Exception as e:
                 logger.error(f"Error aplicando movimiento en turno {move_count}: {e}")
                 break
+            H += delta
         
         logger.info(f"Simulación completa: {len(history)} turnos")
         return history
         
+    except TimeoutError:
+        logger.error(f"Timeout en simulación (max_moves={max_moves})")
+        raise
     except (TypeError, ValueError) as e:
         logger.error(f"Error validando parámetros: {e}")
         raise
@@ -191,6 +279,82 @@ def run_game(max_moves: int = 200, rng: Optional[random.Random] = None) -> List[
         raise RuntimeError(f"Fallo en simulación: {e}") from e
 
 
+def _run_game_worker(
+    max_moves: int,
+    rng: random.Random,
+    remaining: Optional[float]
+) -> List[Tuple[int, float, float]]:
+    """Ejecuta run_game en un worker, re-aplicando el deadline del proceso padre."""
+    if remaining is None:
+        return run_game(max_moves, rng)
+    return soft_timeout(remaining)(run_game)(max_moves, rng)
+
+
+def run_games_parallel(
+    n_games: int,
+    max_moves: int = 200,
+    seed: int = 42,
+    max_workers: Optional[int] = None
+) -> List[List[Tuple[int, float, float]]]:
+    """
+    Ejecuta varias partidas independientes en paralelo (un proceso por worker).
+    
+    Cada partida i usa su propio random.Random(seed + i), por lo que el
+    resultado es reproducible e idéntico a ejecutar run_game en secuencia.
+    Se usan procesos (no threads) porque python-chess es código Python
+    limitado por el GIL.
+    
+    Un soft_timeout activo en el llamador (ContextVar) no llega a los
+    procesos worker: se envía el tiempo restante a cada partida y se
+    re-aplica allí, de modo que check_deadline() corta también en paralelo.
+    
+    Args:
+        n_games: Número de partidas (1-1000)
+        max_moves: Número máximo de movimientos por partida (1-500)
+        seed: Seed base; la partida i usa seed + i
+        max_workers: Procesos a usar (default: os.cpu_count())
+        
+    Returns:
+        Lista con el history de cada partida, en orden
+        
+    Raises:
+        TypeError: Si n_games o max_moves no son int
+        ValueError: Si n_games o max_moves fuera de rango
+        TimeoutError: Si vence el deadline de un soft_timeout activo
+    """
+    try:
+        # bool es subclase de int: rechazarlo explícitamente
+        if not isinstance(n_games, int) or isinstance(n_games, bool):
+            raise TypeError(f"n_games debe ser int, recibido {type(n_games).__name__}")
+        if not 1 <= n_games <= 1000:
+            raise ValueError(f"n_games fuera de rango [1, 1000]: {n_games}")
+        max_moves = validate_max_moves(max_moves)
+        
+        logger.info(f"Iniciando {n_games} partidas en paralelo (max_moves={max_moves})")
+        # El deadline del llamador se convierte en segundos restantes (el
+        # reloj monotónico no es comparable entre procesos en todo sistema)
+        remaining = time_remaining()
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_run_game_worker, max_moves, random.Random(seed + i), remaining)
+                for i in range(n_games)
+            ]
+            results = [future.result() for future in futures]
+        
+        logger.info(f"Partidas completas: {n_games}")
+        return results
+        
+    except TimeoutError:
+        logger.error(f"Timeout en simulación paralela (n_games={n_games})")
+        raise
+    except (TypeError, ValueError) as e:
+        logger.error(f"Error validando parámetros: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Error en simulación paralela: {e}", exc_info=True)
+        raise RuntimeError(f"Fallo en simulación paralela: {e}") from e
+
+
 # -----------------------------
 # Ejecución directa
 # -----------------------------
@@ -207,8 +371,7 @@ if __name__ == "__main__":
             print("\nPrimeros 10 turnos:")
             print("Turno | H      | H_eff")
             print("-" * 30)
-            for t, h, he in data[:10]:
-                print(f"{t:5d} | {h:6.2f} | {he:6.2f}")
+            print("\n".join(f"{t:5d} | {h:6.2f} | {he:6.2f}" for t, h, he in data[:10]))
             
             final_t, final_h, final_he = data[-1]
             print(f"\nEstado final (turno {final_t}):")
@@ -7,8 +7,10 @@ import signal
 import functools
 import logging
 import threading
+from collections import deque
 from typing import Callable, Any, Optional
 from contextlib import contextmanager
+from contextvars import ContextVar
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +74,83 @@ def timeout(seconds: int = 30):
     return decorator
 
 
+# -----------------------------
+# Soft Timeout (deadline cooperativo)
+# -----------------------------
+# Deadline (time.monotonic) del soft_timeout activo en el contexto actual
+_deadline: ContextVar[Optional[float]] = ContextVar("_deadline", default=None)
+
+
+def check_deadline() -> None:
+    """
+    Verifica el deadline del soft_timeout activo.
+    
+    Pensado para llamarse una vez por iteración en loops largos. Sin un
+    soft_timeout activo no hace nada.
+    
+    Raises:
+        TimeoutError: Si el deadline ya venció
+    """
+    deadline = _deadline.get()
+    if deadline is not None and time.monotonic() > deadline:
+        raise TimeoutError("Operación excedió el tiempo límite")
+
+
+def time_remaining() -> Optional[float]:
+    """
+    Segundos restantes hasta el deadline del soft_timeout activo.
+    
+    Útil para propagar el deadline a otros procesos, donde el ContextVar
+    no llega. Puede ser negativo si el deadline ya venció.
+    
+    Returns:
+        Segundos restantes, o None si no hay soft_timeout activo
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def soft_timeout(seconds: float = 30):
+    """
+    Decorator de timeout cooperativo basado en deadline.
+    
+    A diferencia de timeout(), no usa señales: funciona en cualquier thread
+    (incluido Streamlit) y no hace syscalls por llamada. La función decorada
+    debe llamar a check_deadline() periódicamente para poder interrumpirse.
+    
+    Args:
+        seconds: Tiempo máximo en segundos (default: 30)
+        
+    Raises:
+        TimeoutError: Si check_deadline() detecta que se excedió el tiempo
+        
+    Ejemplo:
+        @soft_timeout(10)
+        def long_loop():
+            for _ in range(10**9):
+                check_deadline()
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            deadline = time.monotonic() + seconds
+            # Respetar un deadline externo más estricto (llamadas anidadas)
+            outer = _deadline.get()
+            if outer is not None:
+                deadline = min(deadline, outer)
+            
+            token = _deadline.set(deadline)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _deadline.reset(token)
+        
+        return wrapper
+    return decorator
+
+
 # -----------------------------
 # Rate Limiter Simple
 # -----------------------------
@@ -79,17 +158,34 @@ class SimpleRateLimiter:
     """
     Rate limiter basado en ventana deslizante.
     Previene ejecutar una función más de N veces en T segundos.
+    
+    Thread-safe: Streamlit atiende cada sesión en su propio thread y todos
+    comparten el limiter del decorator rate_limited.
     """
     
-    def __init__(self, max_calls: int, time_window: float):
+    # Atributos fijos: sin __dict__ por instancia
+    __slots__ = ("max_calls", "time_window", "_now", "calls", "_lock")
+    
+    def __init__(
+        self,
+        max_calls: int,
+        time_window: float,
+        time_source: Optional[Callable[[], float]] = None
+    ):
         """
         Args:
             max_calls: Número máximo de llamadas permitidas
             time_window: Ventana de tiempo en segundos
+            time_source: Reloj en segundos (default time.monotonic); inyectable en tests
         """
         self.max_calls = max_calls
         self.time_window = time_window
-        self.calls = []
+        self._now = time_source or time.monotonic
+        # Timestamps en orden de llegada: la más antigua siempre en calls[0]
+        self.calls = deque(maxlen=max_calls)
+        # Protege el read-modify-write de calls (evita que dos threads vean
+        # len < max_calls y ambos agreguen su llamada)
+        self._lock = threading.Lock()
     
     def is_allowed(self) -> bool:
         """
@@ -98,17 +194,20 @@ class SimpleRateLimiter:
         Returns:
             True si está permitida, False si excede el límite
         """
-        now = time.time()
-        
-        # Remover llamadas fuera de la ventana
-        self.calls = [t for t in self.calls if now - t < self.time_window]
-        
-        # Verificar si podemos hacer otra llamada
-        if len(self.calls) < self.max_calls:
-            self.calls.append(now)
-            return True
-        
-        return False
+        with self._lock:
+            now = self._now()
+            
+            # Remover llamadas fuera de la ventana (solo pueden estar al inicio)
+            calls = self.calls
+            while calls and now - calls[0] >= self.time_window:
+                calls.popleft()
+            
+            # Verificar si podemos hacer otra llamada
+            if len(calls) < self.max_calls:
+                calls.append(now)
+                return True
+            
+            return False
     
     def time_until_next_allowed(self) -> float:
         """
@@ -117,12 +216,13 @@ class SimpleRateLimiter:
         Returns:
             Segundos hasta próxima llamada permitida (0 si ya está permitida)
         """
-        if len(self.calls) < self.max_calls:
-            return 0.0
-        
-        now = time.time()
-        oldest_call = min(self.calls)
-        time_until_expires = self.time_window - (now - oldest_call)
+        with self._lock:
+            if len(self.calls) < self.max_calls:
+                return 0.0
+            
+            now = self._now()
+            oldest_call = self.calls[0]
+            time_until_expires = self.time_window - (now - oldest_call)
         
         return max(time_until_expires, 0.0)
 
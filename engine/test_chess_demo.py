@@ -3,79 +3,91 @@
 
 import pytest
 import chess
+import chess.polyglot
+import math
 import random
+import logging
 from chess_demo import (
     validate_max_moves,
     render_board_svg,
+    render_history_svg,
     run_game_stepwise,
     PIECE_CAPACITY,
     ACCESS_WEIGHT
 )
 
+# Mensajes de error esperados en pytest.raises(match=...)
+_MSG_TYPE = "max_moves debe ser int"
+_MSG_RANGE = "fuera de rango"
+_MSG_RENDER = "Fallo al renderizar tablero"
+
+# Apertura de prueba en UCI (evita el parseo SAN en los tests)
+_TEST_UCI_MOVES = ("e2e4", "e7e5", "g1f3")
+
+
+def _records_close(a, b) -> bool:
+    """Compara dos registros (turn, H, H_eff, board, move_san) del historial."""
+    return (
+        a[0] == b[0]
+        and math.isclose(a[1], b[1], abs_tol=0.01)
+        and math.isclose(a[2], b[2], abs_tol=0.01)
+        and chess.polyglot.zobrist_hash(a[3]) == chess.polyglot.zobrist_hash(b[3])
+        and a[4] == b[4]
+    )
+
+
+@pytest.fixture(scope="module")
+def game_cache():
+    """Caché de partidas simuladas por (seed, max_moves), compartida por el módulo."""
+    return {}
+
+
+def _get_history(cache, seed: int, max_moves: int):
+    """Devuelve el historial cacheado de la partida (seed, max_moves) (solo lectura)."""
+    key = (seed, max_moves)
+    if key not in cache:
+        cache[key] = run_game_stepwise(max_moves=max_moves, rng=random.Random(seed))
+    return cache[key]
+
 
 class TestValidateMaxMoves:
     """Tests para validate_max_moves()."""
     
-    def test_valid_values(self):
+    @pytest.mark.parametrize("value", [1, 50, 100, 200])  # Incluye límites 1 y 200
+    def test_valid_values(self, value):
         """Verificar que valores válidos pasan."""
-        assert validate_max_moves(1) == 1
-        assert validate_max_moves(50) == 50
-        assert validate_max_moves(100) == 100
-        assert validate_max_moves(200) == 200
-    
-    def test_invalid_type_string(self):
-        """Verificar TypeError con string."""
-        with pytest.raises(TypeError, match="max_moves debe ser int"):
-            validate_max_moves("50")
-    
-    def test_invalid_type_float(self):
-        """Verificar TypeError con float."""
-        with pytest.raises(TypeError, match="max_moves debe ser int"):
-            validate_max_moves(50.5)
-    
-    def test_invalid_type_none(self):
-        """Verificar TypeError con None."""
-        with pytest.raises(TypeError, match="max_moves debe ser int"):
-            validate_max_moves(None)
-    
-    def test_below_minimum(self):
-        """Verificar ValueError con valor menor a 1."""
-        with pytest.raises(ValueError, match="fuera de rango"):
-            validate_max_moves(0)
-        
-        with pytest.raises(ValueError, match="fuera de rango"):
-            validate_max_moves(-10)
-    
-    def test_above_maximum(self):
-        """Verificar ValueError con valor mayor a 200."""
-        with pytest.raises(ValueError, match="fuera de rango"):
-            validate_max_moves(201)
-        
-        with pytest.raises(ValueError, match="fuera de rango"):
-            validate_max_moves(1000)
-    
-    def test_boundary_values(self):
-        """Verificar valores en los límites."""
-        assert validate_max_moves(1) == 1  # Mínimo
-        assert validate_max_moves(200) == 200  # Máximo
+        assert validate_max_moves(value) == value
+    
+    @pytest.mark.parametrize("value,exc,msg", [
+        ("50", TypeError, _MSG_TYPE),     # Tipos no-int
+        (50.5, TypeError, _MSG_TYPE),
+        (None, TypeError, _MSG_TYPE),
+        (0, ValueError, _MSG_RANGE),      # Fuera de [1, 200]
+        (-10, ValueError, _MSG_RANGE),
+        (201, ValueError, _MSG_RANGE),
+        (1000, ValueError, _MSG_RANGE),
+    ])
+    def test_invalid_values(self, value, exc, msg):
+        """Verificar TypeError con tipos no-int y ValueError fuera de rango."""
+        with pytest.raises(exc, match=msg):
+            validate_max_moves(value)
 
 
 class TestRenderBoardSvg:
     """Tests para render_board_svg()."""
     
-    def test_render_initial_position(self):
+    def test_render_initial_position(self, initial_board):
         """Verificar que renderiza posición inicial correctamente."""
-        board = chess.Board()
-        svg = render_board_svg(board)
+        svg = render_board_svg(initial_board)
         
         assert isinstance(svg, str)
         assert "<svg" in svg
         assert "</svg>" in svg
         assert len(svg) > 1000  # SVG debe ser razonablemente largo
     
-    def test_render_with_custom_size(self):
+    def test_render_with_custom_size(self, initial_board):
         """Verificar que tamaño personalizado funciona."""
-        board = chess.Board()
+        board = initial_board
         svg_small = render_board_svg(board, size=200)
         svg_large = render_board_svg(board, size=800)
         
@@ -84,18 +96,18 @@ class TestRenderBoardSvg:
         assert 'width="200"' in svg_small or 'width="200' in svg_small
         assert 'width="800"' in svg_large or 'width="800' in svg_large
     
-    def test_render_empty_board(self):
+    def test_render_empty_board(self, fresh_board):
         """Verificar que renderiza tablero vacío."""
-        board = chess.Board()
+        board = fresh_board
         board.clear_board()
         svg = render_board_svg(board)
         
         assert isinstance(svg, str)
         assert "<svg" in svg
     
-    def test_render_custom_position(self):
+    def test_render_custom_position(self, fresh_board):
         """Verificar renderización de posición personalizada."""
-        board = chess.Board()
+        board = fresh_board
         board.clear_board()
         board.set_piece_at(chess.E4, chess.Piece(chess.KING, chess.WHITE))
         board.set_piece_at(chess.E5, chess.Piece(chess.KING, chess.BLACK))
@@ -106,35 +118,34 @@ class TestRenderBoardSvg:
     
     def test_invalid_board_type(self):
         """Verificar RuntimeError con tipo incorrecto de board."""
-        with pytest.raises(RuntimeError, match="Fallo al renderizar tablero"):
+        with pytest.raises(RuntimeError, match=_MSG_RENDER):
             render_board_svg("not a board")
         
-        with pytest.raises(RuntimeError, match="Fallo al renderizar tablero"):
+        with pytest.raises(RuntimeError, match=_MSG_RENDER):
             render_board_svg(None)
     
-    def test_invalid_size_type(self):
+    def test_invalid_size_type(self, initial_board):
         """Verificar RuntimeError con size inválido."""
-        board = chess.Board()
+        board = initial_board
         
-        with pytest.raises(RuntimeError, match="Fallo al renderizar tablero"):
+        with pytest.raises(RuntimeError, match=_MSG_RENDER):
             render_board_svg(board, size=50)  # Muy pequeño
         
-        with pytest.raises(RuntimeError, match="Fallo al renderizar tablero"):
+        with pytest.raises(RuntimeError, match=_MSG_RENDER):
             render_board_svg(board, size=2000)  # Muy grande
     
-    def test_invalid_size_type_string(self):
+    def test_invalid_size_type_string(self, initial_board):
         """Verificar RuntimeError con size no-int."""
-        board = chess.Board()
+        board = initial_board
         
-        with pytest.raises(RuntimeError, match="Fallo al renderizar tablero"):
+        with pytest.raises(RuntimeError, match=_MSG_RENDER):
             render_board_svg(board, size="400")
     
-    def test_board_with_moves(self):
+    def test_board_with_moves(self, fresh_board):
         """Verificar renderización después de algunos movimientos."""
-        board = chess.Board()
-        board.push_san("e4")
-        board.push_san("e5")
-        board.push_san("Nf3")
+        board = fresh_board
+        for uci in _TEST_UCI_MOVES:
+            board.push(chess.Move.from_uci(uci))
         
         svg = render_board_svg(board)
         assert isinstance(svg, str)
@@ -144,43 +155,43 @@ class TestRenderBoardSvg:
 class TestRunGameStepwise:
     """Tests para run_game_stepwise()."""
     
-    def test_basic_game(self):
+    def test_basic_game(self, game_cache):
         """Verificar que el juego se ejecuta correctamente."""
-        rng = random.Random(42)
-        history = run_game_stepwise(max_moves=10, rng=rng)
+        history = _get_history(game_cache, 42, 10)
         
         assert len(history) >= 1  # Al menos posición inicial
         assert len(history) <= 11  # Máximo 10 movimientos + inicial
         
-        # Verificar estructura de cada registro
-        for turn, H, H_eff, board, move_san in history:
-            assert isinstance(turn, int)
-            assert isinstance(H, float)
-            assert isinstance(H_eff, float)
-            assert isinstance(board, chess.Board)
-            assert isinstance(move_san, str)
-            assert H >= 0
-            assert H_eff >= 0
+        # Verificar estructura de cada registro (por columnas)
+        turns, Hs, H_effs, boards, sans = zip(*history)
+        assert all(isinstance(turn, int) for turn in turns)
+        assert all(isinstance(H, float) and H >= 0 for H in Hs)
+        assert all(isinstance(H_eff, float) and H_eff >= 0 for H_eff in H_effs)
+        assert all(isinstance(board, chess.Board) for board in boards)
+        assert all(isinstance(move_san, str) for move_san in sans)
+    
+    def test_final_board_keeps_move_stack(self, game_cache):
+        """Verificar que el último tablero conserva el historial de jugadas."""
+        history = _get_history(game_cache, 42, 10)
+        
+        final_turn, _, _, final_board, _ = history[-1]
+        assert len(final_board.move_stack) == final_turn
     
-    def test_initial_position_included(self):
+    def test_initial_position_included(self, game_cache):
         """Verificar que posición inicial está incluida."""
-        rng = random.Random(123)
-        history = run_game_stepwise(max_moves=5, rng=rng)
+        history = _get_history(game_cache, 123, 5)
         
         assert len(history) >= 1
         turn, H, H_eff, board, move_san = history[0]
         
         assert turn == 0
         assert move_san == "Posición inicial"
-        assert board.fen() == chess.Board().fen()
+        assert board.fen() == chess.STARTING_FEN
     
-    def test_different_max_moves(self):
+    def test_different_max_moves(self, game_cache):
         """Verificar que max_moves limita correctamente."""
-        rng1 = random.Random(999)
-        history_short = run_game_stepwise(max_moves=5, rng=rng1)
-        
-        rng2 = random.Random(999)
-        history_long = run_game_stepwise(max_moves=20, rng=rng2)
+        history_short = _get_history(game_cache, 999, 5)
+        history_long = _get_history(game_cache, 999, 20)
         
         # Historia corta debe ser <= historia larga
         assert len(history_short) <= len(history_long)
@@ -198,19 +209,11 @@ class TestRunGameStepwise:
         assert len(results[0]) == len(results[1])
         
         for i in range(len(results[0])):
-            turn1, H1, H_eff1, board1, move1 = results[0][i]
-            turn2, H2, H_eff2, board2, move2 = results[1][i]
-            
-            assert turn1 == turn2
-            assert abs(H1 - H2) < 0.01
-            assert abs(H_eff1 - H_eff2) < 0.01
-            assert board1.fen() == board2.fen()
-            assert move1 == move2
+            assert _records_close(results[0][i], results[1][i]), f"Registro {i} difiere"
     
-    def test_metrics_decrease_or_stable(self):
+    def test_metrics_decrease_or_stable(self, game_cache):
         """Verificar que métricas generalmente disminuyen o son estables."""
-        rng = random.Random(456)
-        history = run_game_stepwise(max_moves=20, rng=rng)
+        history = _get_history(game_cache, 456, 20)
         
         # H generalmente disminuye (capturas)
         first_H = history[0][1]
@@ -219,10 +222,9 @@ class TestRunGameStepwise:
         # Puede disminuir o mantenerse, pero no aumentar mucho
         assert last_H <= first_H * 1.1  # Margen del 10%
     
-    def test_board_state_progression(self):
+    def test_board_state_progression(self, game_cache):
         """Verificar que estados de tablero progresan correctamente."""
-        rng = random.Random(321)
-        history = run_game_stepwise(max_moves=10, rng=rng)
+        history = _get_history(game_cache, 321, 10)
         
         # Cada tablero debe ser diferente del anterior (excepto si termina)
         for i in range(1, len(history)):
@@ -231,28 +233,27 @@ class TestRunGameStepwise:
             
             # Si hay más turnos después, el tablero debe haber cambiado
             if i < len(history) - 1:
-                # Verificar que FEN es diferente (al menos el turno cambió)
-                assert prev_board.fen() != curr_board.fen() or curr_board.is_game_over()
+                # Verificar que el hash Zobrist es diferente (al menos el turno cambió)
+                assert (
+                    chess.polyglot.zobrist_hash(prev_board) != chess.polyglot.zobrist_hash(curr_board)
+                    or curr_board.is_game_over()
+                )
     
-    def test_move_san_format(self):
+    def test_move_san_format(self, game_cache):
         """Verificar que move_san está en formato correcto."""
-        rng = random.Random(111)
-        history = run_game_stepwise(max_moves=10, rng=rng)
+        history = _get_history(game_cache, 111, 10)
         
         # Primer registro es posición inicial
         assert history[0][4] == "Posición inicial"
         
         # Registros siguientes deben tener notación SAN
-        for i in range(1, len(history)):
-            move_san = history[i][4]
-            assert isinstance(move_san, str)
-            assert len(move_san) > 0
-            assert move_san != ""
+        assert all(
+            isinstance(move_san, str) and move_san
+            for _, _, _, _, move_san in history[1:]
+        )
     
     def test_game_over_detection(self, caplog):
         """Verificar que detecta cuando juego termina."""
-        import logging
-        
         with caplog.at_level(logging.INFO):
             rng = random.Random(888)
             history = run_game_stepwise(max_moves=100, rng=rng)
@@ -263,21 +264,19 @@ class TestRunGameStepwise:
     
     def test_invalid_max_moves_type(self):
         """Verificar que valida tipo de max_moves."""
-        with pytest.raises(TypeError, match="max_moves debe ser int"):
+        with pytest.raises(TypeError, match=_MSG_TYPE):
             run_game_stepwise(max_moves="10")
     
     def test_invalid_max_moves_range(self):
         """Verificar que valida rango de max_moves."""
-        with pytest.raises(ValueError, match="fuera de rango"):
+        with pytest.raises(ValueError, match=_MSG_RANGE):
             run_game_stepwise(max_moves=0)
         
-        with pytest.raises(ValueError, match="fuera de rango"):
+        with pytest.raises(ValueError, match=_MSG_RANGE):
             run_game_stepwise(max_moves=300)
     
     def test_structural_collapse_detection(self, caplog):
         """Verificar detección de colapso estructural."""
-        import logging
-        
         # Difícil provocar colapso real, pero al menos verificar que no falla
         with caplog.at_level(logging.WARNING):
             rng = random.Random(555)
@@ -286,10 +285,9 @@ class TestRunGameStepwise:
         # Verificar que se ejecuta correctamente
         assert len(history) >= 1
     
-    def test_short_game(self):
+    def test_short_game(self, game_cache):
         """Verificar juego muy corto (1 movimiento)."""
-        rng = random.Random(222)
-        history = run_game_stepwise(max_moves=1, rng=rng)
+        history = _get_history(game_cache, 222, 1)
         
         # Debe tener inicial + posiblemente 1 movimiento
         assert 1 <= len(history) <= 2
@@ -308,8 +306,8 @@ class TestRunGameStepwise:
             original_fen = board1.fen()
             
             # Intentar modificar board1 (si tiene movimientos legales)
-            if list(board1.legal_moves):
-                move = list(board1.legal_moves)[0]
+            move = next(iter(board1.legal_moves), None)
+            if move is not None:
                 board1.push(move)
                 
                 # board2 no debe verse afectado
@@ -335,16 +333,24 @@ class TestConstants:
 class TestIntegration:
     """Tests de integración entre funciones."""
     
-    def test_full_game_with_rendering(self):
+    def test_full_game_with_rendering(self, game_cache):
         """Verificar que juego completo + rendering funciona."""
-        rng = random.Random(999)
-        history = run_game_stepwise(max_moves=5, rng=rng)
+        history = _get_history(game_cache, 999, 5)
         
         # Renderizar cada estado
-        for turn, H, H_eff, board, move_san in history:
-            svg = render_board_svg(board, size=300)
-            assert isinstance(svg, str)
-            assert "<svg" in svg
+        svgs = render_history_svg(history, size=300)
+        assert len(svgs) == len(history)
+        assert all(isinstance(svg, str) and "<svg" in svg for svg in svgs)
+    
+    def test_render_history_invalid_input(self, game_cache):
+        """Verificar RuntimeError con size inválido o registros sin tablero."""
+        history = _get_history(game_cache, 999, 5)
+        
+        with pytest.raises(RuntimeError, match=_MSG_RENDER):
+            render_history_svg(history, size=50)
+        
+        with pytest.raises(RuntimeError, match=_MSG_RENDER):
+            render_history_svg([(0, 0.0, 0.0, "not a board", "")])
     
     def test_validation_in_game(self):
         """Verificar que validación se aplica en run_game_stepwise."""
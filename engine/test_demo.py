@@ -3,6 +3,7 @@
 
 import pytest
 import networkx as nx
+import numpy as np
 import random
 from demo import (
     Node,
@@ -11,6 +12,16 @@ from demo import (
 )
 
 
+def _utilizations(nodes):
+    """Utilización load/capacity de cada nodo como array."""
+    return np.fromiter((n.load / n.capacity for n in nodes.values()), dtype=np.float64, count=len(nodes))
+
+
+def _slacks(nodes):
+    """Holgura de cada nodo como array."""
+    return np.fromiter((n.slack for n in nodes.values()), dtype=np.float64, count=len(nodes))
+
+
 class TestNode:
     """Tests para la clase Node."""
     
@@ -59,61 +70,53 @@ class TestNode:
 class TestBuildGraph:
     """Tests para build_graph."""
     
-    def test_build_graph_basic(self):
+    def test_build_graph_basic(self, seeded_graphs):
         """Verificar que build_graph construye un grafo."""
-        random.seed(42)
-        G, nodes = build_graph(n=6)
+        G, nodes = seeded_graphs[6]
         
         assert isinstance(G, nx.Graph)
         assert isinstance(nodes, dict)
         assert len(nodes) == 6
     
-    def test_build_graph_node_count(self):
+    def test_build_graph_node_count(self, seeded_graphs):
         """Verificar que se crean n nodos."""
-        random.seed(42)
-        
         for n in [3, 6, 10]:
-            G, nodes = build_graph(n=n)
+            G, nodes = seeded_graphs[n]
             assert len(nodes) == n
             assert G.number_of_nodes() == n
     
-    def test_build_graph_nodes_are_node_objects(self):
+    def test_build_graph_nodes_are_node_objects(self, seeded_graphs):
         """Verificar que los nodos son instancias de Node."""
-        random.seed(42)
-        G, nodes = build_graph(n=5)
+        G, nodes = seeded_graphs[5]
         
         for name, node in nodes.items():
             assert isinstance(node, Node)
             assert node.name == name
     
-    def test_build_graph_capacity_range(self):
+    def test_build_graph_capacity_range(self, seeded_graphs):
         """Verificar que capacidades están en rango [80, 120]."""
-        random.seed(42)
-        G, nodes = build_graph(n=10)
+        G, nodes = seeded_graphs[10]
         
         for node in nodes.values():
             assert 80 <= node.capacity <= 120
     
-    def test_build_graph_load_valid(self):
+    def test_build_graph_load_valid(self, seeded_graphs):
         """Verificar que load está entre 40 y capacity."""
-        random.seed(42)
-        G, nodes = build_graph(n=10)
+        G, nodes = seeded_graphs[10]
         
         for node in nodes.values():
             assert 40 <= node.load <= node.capacity
     
-    def test_build_graph_has_edges(self):
+    def test_build_graph_has_edges(self, seeded_graphs):
         """Verificar que el grafo tiene aristas."""
-        random.seed(42)
-        G, nodes = build_graph(n=6)
+        G, nodes = seeded_graphs[6]
         
         # Debe haber al menos n+2 aristas según código
         assert G.number_of_edges() >= 6  # Puede variar por random.sample
     
-    def test_build_graph_edge_attributes(self):
+    def test_build_graph_edge_attributes(self, seeded_graphs):
         """Verificar que aristas tienen atributo friction."""
-        random.seed(42)
-        G, nodes = build_graph(n=5)
+        G, nodes = seeded_graphs[5]
         
         for u, v, data in G.edges(data=True):
             assert 'friction' in data
@@ -150,31 +153,27 @@ class TestBuildGraph:
 class TestComputeMetrics:
     """Tests para compute_metrics."""
     
-    def test_compute_metrics_basic(self):
+    def test_compute_metrics_basic(self, seeded_graphs):
         """Verificar que compute_metrics retorna 3 valores numéricos."""
-        random.seed(42)
-        G, nodes = build_graph(n=6)
+        G, nodes = seeded_graphs[6]
         H, H_eff, S = compute_metrics(G, nodes)
         
         assert isinstance(H, (int, float))
         assert isinstance(H_eff, (int, float))
         assert isinstance(S, (int, float))
     
-    def test_compute_metrics_h_is_sum_of_slacks(self):
+    def test_compute_metrics_h_is_sum_of_slacks(self, seeded_graphs):
         """Verificar que H es la suma de todos los slacks."""
-        random.seed(42)
-        G, nodes = build_graph(n=5)
+        G, nodes = seeded_graphs[5]
         H, _, _ = compute_metrics(G, nodes)
         
-        expected_H = sum(node.slack for node in nodes.values())
+        expected_H = _slacks(nodes).sum()
         assert abs(H - expected_H) < 0.01  # Tolerancia numérica
     
-    def test_compute_metrics_h_eff_le_h(self):
+    def test_compute_metrics_h_eff_le_h(self, seeded_graphs):
         """Verificar que H_eff <= H siempre."""
-        random.seed(42)
-        
         for n in [3, 6, 10]:
-            G, nodes = build_graph(n=n)
+            G, nodes = seeded_graphs[n]
             H, H_eff, _ = compute_metrics(G, nodes)
             
             assert H_eff <= H, f"H_eff ({H_eff}) debe ser <= H ({H})"
@@ -203,11 +202,10 @@ class TestComputeMetrics:
         assert H_eff == 0.0  # Sin conexiones, grado = 0, H_eff = 0
         assert S >= 0.0
     
-    def test_compute_metrics_fully_connected_vs_disconnected(self):
+    def test_compute_metrics_fully_connected_vs_disconnected(self, seeded_graphs):
         """Comparar H_eff entre grafo conectado y desconectado."""
         # Grafo conectado (todos tienen conexiones)
-        random.seed(42)
-        G_connected, nodes_connected = build_graph(n=6)
+        G_connected, nodes_connected = seeded_graphs[6]
         _, H_eff_connected, _ = compute_metrics(G_connected, nodes_connected)
         
         # Grafo desconectado (nodos aislados)
@@ -297,10 +295,9 @@ class TestComputeMetrics:
 class TestIntegration:
     """Tests de integración."""
     
-    def test_full_workflow(self):
+    def test_full_workflow(self, seeded_graphs):
         """Test de flujo completo: construir grafo y calcular métricas."""
-        random.seed(42)
-        G, nodes = build_graph(n=8)
+        G, nodes = seeded_graphs[8]
         H, H_eff, S = compute_metrics(G, nodes)
         
         # Verificar consistencia
@@ -311,10 +308,9 @@ class TestIntegration:
         assert S >= 0
         assert H_eff <= H
     
-    def test_state_detection(self):
+    def test_state_detection(self, seeded_graphs):
         """Verificar detección de estados del sistema."""
-        random.seed(42)
-        G, nodes = build_graph(n=6)
+        G, nodes = seeded_graphs[6]
         H, H_eff, S = compute_metrics(G, nodes)
         
         # Determinar estado
@@ -346,11 +342,16 @@ class TestIntegration:
 
 
 # Fixtures
+@pytest.fixture(scope="session")
+def seeded_graphs():
+    """Grafos de solo lectura construidos una vez por tamaño (rng aislado, seed 42)."""
+    return {n: build_graph(n=n, rng=random.Random(42)) for n in (3, 5, 6, 8, 10)}
+
+
 @pytest.fixture
-def sample_graph():
+def sample_graph(seeded_graphs):
     """Fixture con grafo de ejemplo."""
-    random.seed(42)
-    return build_graph(n=6)
+    return seeded_graphs[6]
 
 
 @pytest.fixture
@@ -375,14 +376,12 @@ def test_with_sample_graph_fixture(sample_graph):
 def test_with_balanced_nodes_fixture(balanced_nodes):
     """Test usando fixture de nodos balanceados."""
     # Todos los nodos tienen misma utilización
-    utilizations = [n.load / n.capacity for n in balanced_nodes.values()]
+    utilizations = _utilizations(balanced_nodes)
     
-    assert all(u == 0.5 for u in utilizations)
+    assert (utilizations == 0.5).all()
     
     # Entropía debe ser cercana a 0
-    mean = sum(utilizations) / len(utilizations)
-    variance = sum((u - mean) ** 2 for u in utilizations) / len(utilizations)
-    assert variance < 0.01
+    assert utilizations.var() < 0.01
 
 
 if __name__ == "__main__":
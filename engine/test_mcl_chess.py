@@ -7,7 +7,23 @@ from mcl_chess import (
     PIECE_CAPACITY,
     ACCESS_WEIGHT,
     compute_holistic_metrics,
-    run_game
+    run_game,
+    run_games_parallel
+)
+
+
+# Historial de referencia de run_game(max_moves=10, rng=random.Random(42))
+_REFERENCE_HISTORY_SEED42 = (
+    (0, 98.0, 19.875),
+    (1, 98.0, 20.375),
+    (2, 98.0, 20.875),
+    (3, 98.0, 20.875),
+    (4, 98.0, 20.875),
+    (5, 98.0, 21.1875),
+    (6, 98.0, 20.6875),
+    (7, 98.0, 20.6875),
+    (8, 98.0, 20.875),
+    (9, 98.0, 20.375),
 )
 
 
@@ -122,22 +138,19 @@ class TestComputeHolisticMetrics:
         max_H_eff = H * ACCESS_WEIGHT
         assert H_eff <= max_H_eff
     
-    def test_metrics_are_non_negative(self):
+    @pytest.mark.parametrize("fen", [
+        None,  # Posición inicial
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",  # Inicial
+        "8/8/8/8/8/8/8/8 w - - 0 1",  # Vacío
+        "4k3/8/8/8/8/8/8/4K3 w - - 0 1",  # Solo reyes
+    ])
+    def test_metrics_are_non_negative(self, fen):
         """Verificar que métricas nunca son negativas."""
-        # Probar varias posiciones
-        positions = [
-            None,  # Posición inicial
-            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",  # Inicial
-            "8/8/8/8/8/8/8/8 w - - 0 1",  # Vacío
-            "4k3/8/8/8/8/8/8/4K3 w - - 0 1",  # Solo reyes
-        ]
-        
-        for fen in positions:
-            board = chess.Board() if fen is None else chess.Board(fen=fen)
-            H, H_eff = compute_holistic_metrics(board)
-            
-            assert H >= 0, f"H negativo en posición {fen}"
-            assert H_eff >= 0, f"H_eff negativo en posición {fen}"
+        board = chess.Board() if fen is None else chess.Board(fen=fen)
+        H, H_eff = compute_holistic_metrics(board)
+        
+        assert H >= 0, f"H negativo en posición {fen}"
+        assert H_eff >= 0, f"H_eff negativo en posición {fen}"
 
 
 class TestRunGame:
@@ -198,19 +211,65 @@ class TestRunGame:
         """Verificar que con misma seed produce mismos resultados."""
         import random
         
-        rng1 = random.Random(42)
-        history1 = run_game(max_moves=10, rng=rng1)
-        
-        rng2 = random.Random(42)
-        history2 = run_game(max_moves=10, rng=rng2)
+        history = run_game(max_moves=10, rng=random.Random(42))
         
-        # Deberían ser idénticos
-        assert len(history1) == len(history2)
+        # Debe coincidir con la referencia registrada para seed=42
+        assert len(history) == len(_REFERENCE_HISTORY_SEED42)
         
-        for (t1, h1, he1), (t2, h2, he2) in zip(history1, history2):
+        for (t1, h1, he1), (t2, h2, he2) in zip(history, _REFERENCE_HISTORY_SEED42):
             assert t1 == t2
             assert abs(h1 - h2) < 0.01  # Tolerancia numérica
             assert abs(he1 - he2) < 0.01
+    
+    def test_run_game_respects_soft_timeout(self):
+        """Verificar que run_game se corta si vence el deadline de soft_timeout."""
+        from rate_limiter import soft_timeout, TimeoutError
+        
+        @soft_timeout(-1)  # Deadline ya vencido: corta en el primer turno
+        def late_game():
+            return run_game(max_moves=10)
+        
+        with pytest.raises(TimeoutError):
+            late_game()
+
+
+class TestRunGamesParallel:
+    """Tests para run_games_parallel."""
+    
+    def test_matches_sequential_runs(self):
+        """Verificar que cada partida equivale a run_game con seed + i."""
+        import random
+        
+        results = run_games_parallel(n_games=3, max_moves=20, seed=7, max_workers=2)
+        
+        assert len(results) == 3
+        for i, history in enumerate(results):
+            assert history == run_game(max_moves=20, rng=random.Random(7 + i))
+    
+    def test_invalid_n_games(self):
+        """Verificar validación de n_games."""
+        with pytest.raises(ValueError, match="fuera de rango"):
+            run_games_parallel(n_games=0)
+        with pytest.raises(TypeError, match="debe ser int"):
+            run_games_parallel(n_games="3")
+        with pytest.raises(TypeError, match="debe ser int"):
+            run_games_parallel(n_games=True)
+    
+    def test_invalid_max_moves_bool(self):
+        """Verificar que max_moves=True se rechaza igual que n_games=True."""
+        with pytest.raises(TypeError, match="max_moves debe ser int"):
+            run_games_parallel(n_games=2, max_moves=True)
+    
+    def test_soft_timeout_reaches_workers(self):
+        """Verificar que el deadline del llamador se aplica en los workers."""
+        from rate_limiter import soft_timeout, TimeoutError
+        
+        @soft_timeout(-1)  # Deadline ya vencido: cada worker corta en su primer turno
+        def late_games():
+            return run_games_parallel(n_games=2, max_moves=10, max_workers=2)
+        
+        with pytest.raises(TimeoutError):
+            late_games()
 
 
 class TestIntegration:
@@ -241,6 +300,19 @@ class TestIntegration:
         for _, H, H_eff in history:
             assert H_eff <= H, "H_eff no puede exceder H"
 
+    def test_incremental_H_matches_full_recompute(self):
+        """Verificar que el H incremental de run_game coincide con recalcularlo."""
+        import random
+
+        history = run_game(max_moves=200, rng=random.Random(7))
+
+        # Reproducir la misma partida con la misma seed
+        replay_rng = random.Random(7)
+        board = chess.Board()
+        for _, H, H_eff in history:
+            assert (H, H_eff) == compute_holistic_metrics(board)
+            board.push(replay_rng.choice(list(board.legal_moves)))
+
 
 @pytest.fixture
 def standard_board():
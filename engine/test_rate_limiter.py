@@ -5,6 +5,8 @@ import pytest
 import time
 from rate_limiter import (
     timeout,
+    soft_timeout,
+    check_deadline,
     TimeoutError,
     SimpleRateLimiter,
     validate_computational_cost,
@@ -46,6 +48,58 @@ class TestTimeoutDecorator:
         assert result == 6
 
 
+class TestSoftTimeoutDecorator:
+    """Tests para el decorator @soft_timeout y check_deadline()."""
+    
+    def test_fast_function_completes(self):
+        """Verificar que funciones rápidas completan sin problema."""
+        @soft_timeout(2)
+        def fast_func():
+            check_deadline()
+            return "completed"
+        
+        assert fast_func() == "completed"
+    
+    def test_polling_loop_times_out(self):
+        """Verificar que check_deadline() interrumpe un loop que excede el tiempo."""
+        @soft_timeout(0.1)
+        def slow_loop():
+            while True:
+                check_deadline()
+                time.sleep(0.01)
+        
+        with pytest.raises(TimeoutError):
+            slow_loop()
+    
+    def test_check_deadline_without_soft_timeout(self):
+        """Verificar que check_deadline() no hace nada fuera de un soft_timeout."""
+        check_deadline()
+    
+    def test_works_in_secondary_thread(self):
+        """Verificar que el timeout también aplica fuera del main thread."""
+        import threading
+        
+        @soft_timeout(0.1)
+        def slow_loop():
+            while True:
+                check_deadline()
+                time.sleep(0.01)
+        
+        errors = []
+        
+        def target():
+            try:
+                slow_loop()
+            except TimeoutError as e:
+                errors.append(e)
+        
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join(timeout=5)
+        
+        assert len(errors) == 1
+
+
 class TestSimpleRateLimiter:
     """Tests para SimpleRateLimiter."""
     
@@ -60,17 +114,44 @@ class TestSimpleRateLimiter:
     
     def test_resets_after_time_window(self):
         """Verificar que se resetea después de la ventana de tiempo."""
-        limiter = SimpleRateLimiter(max_calls=2, time_window=1.0)
+        # Reloj falso: avanzar el tiempo sin dormir
+        clock = [0.0]
+        limiter = SimpleRateLimiter(max_calls=2, time_window=1.0, time_source=lambda: clock[0])
         
         assert limiter.is_allowed()  # 1
         assert limiter.is_allowed()  # 2
         assert not limiter.is_allowed()  # 3 - bloqueada
         
+        # Justo antes de expirar la ventana sigue bloqueada
+        clock[0] = 0.9
+        assert not limiter.is_allowed()
+        assert limiter.time_until_next_allowed() == pytest.approx(0.1)
+        
         # Esperar a que expire la ventana
-        time.sleep(1.1)
+        clock[0] = 1.1
         
         assert limiter.is_allowed()  # 4 - permitida después de reset
     
+    def test_concurrent_calls_respect_limit(self):
+        """Verificar que threads concurrentes no exceden max_calls."""
+        import threading
+        
+        limiter = SimpleRateLimiter(max_calls=5, time_window=10.0)
+        results = []
+        barrier = threading.Barrier(20)
+        
+        def worker():
+            barrier.wait()
+            results.append(limiter.is_allowed())
+        
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert results.count(True) == 5
+    
     def test_time_until_next_allowed(self):
         """Verificar cálculo de tiempo hasta próxima llamada."""
         limiter = SimpleRateLimiter(max_calls=2, time_window=5.0)